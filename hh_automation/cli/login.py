@@ -5,9 +5,10 @@ import os
 from typing import Optional
 
 from ..config import get_settings
-from ..services.browser import BrowserManager
 
 async def login() -> None:
+    from ..services.browser import BrowserManager
+
     settings = get_settings()
     settings.ensure_dirs()
     manager = BrowserManager()
@@ -218,7 +219,13 @@ async def login() -> None:
         print(f"\n✓ Session saved to: {settings.session_file}")
 
 def main() -> None:
-    asyncio.run(login())
+    # uvloop быстрее стандартного цикла событий; на Windows его нет
+    try:
+        import uvloop
+    except ImportError:
+        asyncio.run(login())
+    else:
+        uvloop.run(login())
 
 if __name__ == "__main__":
     main()
@@ -25,6 +25,12 @@ class Settings(BaseSettings):
     browser_headless: bool = Field(default=True, alias="BROWSER_HEADLESS")
     browser_slow_mo: int = Field(default=0, alias="BROWSER_SLOW_MO")
     page_timeout: int = Field(default=30000, alias="PAGE_TIMEOUT")
+    # Порт CDP внешнего Chromium: если задан, подключаемся к нему вместо запуска своего
+    browser_cdp_port: int = Field(default=0, alias="BROWSER_CDP_PORT")
+    # Максимум одновременно открытых вкладок с сессией
+    browser_max_pages: int = Field(default=4, ge=1, alias="BROWSER_MAX_PAGES")
+    # Не загружать картинки и счетчики аналитики (флаги запуска Chromium)
+    browser_block_resources: bool = Field(default=True, alias="BROWSER_BLOCK_RESOURCES")
 
     @property
     def session_file(self) -> Path:
@@ -73,7 +73,7 @@ async def search_vacancies(
     
     Возвращает список вакансий с заголовком, URL, работодателем и описанием.
     """
-    logger.info(f"Search request: text='{text}', page={page}")
+    logger.info("Search request: text='%s', page=%s", text, page)
     
     try:
         vacancies = await search_service.search(query=text, page_num=page)
@@ -83,7 +83,7 @@ async def search_vacancies(
     except RuntimeError as e:
         raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
-        logger.error(f"Search failed: {e}", exc_info=True)
+        logger.error("Search failed: %s", e, exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
 
 
@@ -94,13 +94,13 @@ async def apply_to_vacancy(request: ApplyRequest) -> ApplyResponse:
     
     Возвращает статус и сообщение результата отклика.
     """
-    logger.info(f"Apply request: url={request.url}")
+    logger.info("Apply request: url=%s", request.url)
     
     try:
         result = await apply_service.apply(str(request.url), request.message)
         return ApplyResponse(**result)
     except Exception as e:
-        logger.error(f"Apply failed: {e}", exc_info=True)
+        logger.error("Apply failed: %s", e, exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
 
 
@@ -119,7 +119,7 @@ def run():
     import uvicorn
     settings = get_settings()
     
-    logger.info(f"Starting HH Automation API on http://{settings.server_host}:{settings.server_port}")
+    logger.info("Starting HH Automation API on http://%s:%s", settings.server_host, settings.server_port)
     logger.info("Endpoints:")
     logger.info("  GET  /search?text=Frontend&page=0")
     logger.info("  POST /apply  { 'url': '...', 'message': '...' }")
@@ -1,5 +1,26 @@
-from .browser import BrowserManager, browser_manager
-from .search import VacancySearchService
-from .apply import VacancyApplyService
+from importlib import import_module
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .browser import BrowserManager, browser_manager
+    from .search import VacancySearchService
+    from .apply import VacancyApplyService
+
+# Подмодули (и Playwright вместе с ними) импортируются при первом обращении
+_EXPORTS = {
+    "BrowserManager": ".browser",
+    "browser_manager": ".browser",
+    "VacancySearchService": ".search",
+    "VacancyApplyService": ".apply",
+}
 
 __all__ = ["BrowserManager", "browser_manager", "VacancySearchService", "VacancyApplyService"]
+
+
+def __getattr__(name: str):
+    module_name = _EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(module_name, __name__), name)
+    globals()[name] = value
+    return value
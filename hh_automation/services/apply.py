@@ -1,16 +1,105 @@
 """Асинхронный сервис отклика на вакансии."""
 
+import asyncio
 import logging
+from collections import OrderedDict
 from dataclasses import dataclass
 from enum import Enum
 from typing import Optional
 
-from playwright.async_api import Page
+from playwright.async_api import Locator, Page, Response, TimeoutError as PlaywrightTimeoutError
 
-from .browser import browser_manager
+from .browser import BOT_PROTECTION_EXPR, browser_manager
 
 logger = logging.getLogger(__name__)
 
+# Сколько последних результатов откликов помнить, чтобы не повторять их для тех же URL
+RESULT_CACHE_SIZE = 10_000
+
+# Селекторы и тексты страницы вакансии
+SEL_MODAL = "[data-qa='vacancy-response-popup']"
+SEL_LETTER_AREA = "textarea[data-qa='vacancy-response-popup-form-letter-input']"
+SEL_MODAL_SUBMIT = "button[data-qa='vacancy-response-submit-popup']"
+SEL_APPLY_TOP = "[data-qa='vacancy-response-link-top']"
+SEL_APPLY_BOTTOM = "[data-qa='vacancy-response-link-bottom']"
+# Стрелка выпадающего меню — кнопка сразу после кнопки отклика
+SEL_DROPDOWN_TOGGLE = "xpath=following-sibling::*[1][self::button]"
+SEL_TEXTAREA = "textarea"
+
+TEXT_COVER_LINK = "Написать сопроводительное"
+TEXT_WITH_LETTER = "С сопроводительным письмом"
+TEXT_POST_APPLY_SUBMIT = "Отправить"
+TEXT_ALREADY_APPLIED = "Вы откликнулись"
+TEXT_RESUME_DELIVERED = "Резюме доставлено"
+SUCCESS_TEXTS = ("Отклик отправлен", TEXT_ALREADY_APPLIED, TEXT_RESUME_DELIVERED)
+
+SEL_COVER_LINK = f"a:has-text('{TEXT_COVER_LINK}')"
+SEL_WITH_LETTER = f"text={TEXT_WITH_LETTER}"
+SEL_POST_APPLY_SUBMIT = f"button:has-text('{TEXT_POST_APPLY_SUBMIT}')"
+# Любое из конечных состояний загруженной вакансии: кнопка отклика, отметка об отклике, капча
+SEL_PAGE_READY = (
+    f"{SEL_APPLY_TOP}, {SEL_APPLY_BOTTOM}, "
+    f":text('{TEXT_ALREADY_APPLIED}'), [data-qa*=captcha]"
+)
+# Результат отправки отклика: текст об успехе
+SEL_SUCCESS = ", ".join(f":text('{text}')" for text in SUCCESS_TEXTS)
+# Результат клика по кнопке отклика: успех, поле для письма или модальное окно
+SEL_APPLY_OUTCOME = f"{SEL_SUCCESS}, {SEL_TEXTAREA}, {SEL_MODAL}"
+
+# Снимок состояния страницы за один вызов evaluate вместо серии locator().count()
+_PROBE_STATE_JS = """
+(q) => {
+    // Как в text= у Playwright: схлопываем пробелы (включая NBSP и переводы строк)
+    const normalize = (text) => (text || "").replace(/\\s+/g, " ").toLowerCase();
+    const count = (selector) => document.querySelectorAll(selector).length;
+    const countWithText = (selector, needle) => Array.from(document.querySelectorAll(selector))
+        .filter((el) => normalize(el.textContent).includes(normalize(needle)))
+        .length;
+    const bodyText = normalize(document.body ? document.body.innerText : "");
+    const hasText = (needle) => bodyText.includes(normalize(needle));
+
+    return {
+        captcha: """ + BOT_PROTECTION_EXPR + """,
+        alreadyApplied: hasText(q.alreadyAppliedText),
+        coverLink: countWithText("a", q.coverLinkText),
+        dropdownTop: count(q.applyTop + " + button"),
+        dropdownBottom: count(q.applyBottom + " + button"),
+        applyTop: count(q.applyTop),
+        applyBottom: count(q.applyBottom),
+        modalLetterArea: count(q.letterArea),
+        modalSubmit: count(q.modalSubmit),
+        textareas: count(q.textarea),
+        submitButton: countWithText("button", q.postApplySubmitText),
+        resumeDelivered: hasText(q.resumeDeliveredText),
+    };
+}
+"""
+_PROBE_STATE_ARGS = {
+    "alreadyAppliedText": TEXT_ALREADY_APPLIED,
+    "coverLinkText": TEXT_COVER_LINK,
+    "applyTop": SEL_APPLY_TOP,
+    "applyBottom": SEL_APPLY_BOTTOM,
+    "letterArea": SEL_LETTER_AREA,
+    "modalSubmit": SEL_MODAL_SUBMIT,
+    "textarea": SEL_TEXTAREA,
+    "postApplySubmitText": TEXT_POST_APPLY_SUBMIT,
+    "resumeDeliveredText": TEXT_RESUME_DELIVERED,
+}
+
+# Проверка успеха отклика: один проход по тексту страницы для всех вариантов
+_SUCCESS_JS = """
+(texts) => {
+    const normalize = (text) => (text || "").replace(/\\s+/g, " ").toLowerCase();
+    const bodyText = normalize(document.body ? document.body.innerText : "");
+    return texts.some((needle) => bodyText.includes(normalize(needle)));
+}
+"""
+
+
+def _is_apply_response(response: Response) -> bool:
+    """Ответ HH.ru на отправку отклика."""
+    return "vacancy_response" in response.url and response.status < 400
+
 
 class ApplyStatus(str, Enum):
     """Статус коды"""
@@ -24,6 +113,8 @@ class ApplyResult:
     """Результат попытки отклика на вакансию."""
     status: ApplyStatus
     message: str
+    # Отклик подтвержден текстом на странице; только такие результаты кэшируются
+    confirmed: bool = False
 
     def to_dict(self) -> dict:
         return {"status": self.status.value, "message": self.message}
@@ -32,16 +123,56 @@ class ApplyResult:
 class VacancyApplyService:
     """Сервис для отклика на вакансии на HH.ru."""
 
-    async def _check_bot_protection(self, page: Page) -> bool:
-        """Проверка, сработала ли защита от ботов (капча)."""
-        title = await page.title()
-        content = await page.content()
-        return "captcha" in title.lower() or "robot" in content.lower()
+    def __init__(self) -> None:
+        # LRU последних подтвержденных и пропущенных результатов по URL вакансии
+        self._result_cache: OrderedDict[str, dict] = OrderedDict()
+        # Версия файла сессии, для которой собран кэш: после повторного входа
+        # (возможно, в другой аккаунт) старые результаты недействительны
+        self._cache_session_version: Optional[int] = None
+        # Отклики, выполняющиеся прямо сейчас, чтобы не отправлять дубликаты параллельно
+        self._in_flight: dict[str, asyncio.Future] = {}
 
-    async def _check_already_applied(self, page: Page) -> bool:
-        """Проверка, был ли уже совершен отклик на эту вакансию."""
-        locator = page.locator("text=Вы откликнулись")
-        return await locator.count() > 0
+    async def _probe_state(self, page: Page) -> dict:
+        """
+        Сбор состояния страницы за один round-trip к браузеру.
+        
+        Возвращает:
+            Словарь с флагами и количеством найденных элементов.
+        """
+        return await page.evaluate(_PROBE_STATE_JS, _PROBE_STATE_ARGS)
+
+    async def _click_and_wait_outcome(
+        self,
+        page: Page,
+        locator: Locator,
+        outcome_selector: str,
+        timeout: int = 3000
+    ) -> None:
+        """
+        Клик с ожиданием результата отклика вместо фиксированной паузы.
+        
+        Ждет ответа сервера на отклик, затем появления outcome_selector на странице,
+        пока HH.ru отрисовывает результат. Общее ожидание ограничено timeout;
+        если ничего не появилось, продолжаем: результат проверяется дальше.
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout / 1000
+
+        clicked = False
+        try:
+            async with page.expect_response(_is_apply_response, timeout=timeout):
+                await locator.click()
+                clicked = True
+        except PlaywrightTimeoutError:
+            if not clicked:
+                raise
+            logger.debug("No vacancy_response reply, continuing")
+
+        remaining = max(int((deadline - loop.time()) * 1000), 500)
+        try:
+            await page.wait_for_selector(outcome_selector, timeout=remaining)
+        except PlaywrightTimeoutError:
+            logger.debug("Apply outcome did not appear, continuing")
 
     async def _fill_cover_letter_modal(
         self,
@@ -56,41 +187,54 @@ class VacancyApplyService:
         """
         try:
             logger.debug("Waiting for application modal...")
-            await page.wait_for_selector("[data-qa='vacancy-response-popup']", timeout=5000)
-            await page.wait_for_timeout(1000)
+            await page.wait_for_selector(SEL_MODAL, timeout=5000)
+            try:
+                await page.locator(SEL_LETTER_AREA).wait_for(state="visible", timeout=3000)
+            except PlaywrightTimeoutError:
+                pass
             
-            letter_area = page.locator(
-                "textarea[data-qa='vacancy-response-popup-form-letter-input']"
-            )
-            if await letter_area.count() > 0:
-                logger.debug(f"Filling cover letter ({len(message)} chars)")
-                await letter_area.fill(message)
+            state = await self._probe_state(page)
+            if state["modalLetterArea"]:
+                logger.debug("Filling cover letter (%d chars)", len(message))
+                await page.locator(SEL_LETTER_AREA).fill(message)
             else:
                 logger.warning("Cover letter field not found in modal")
             
-            submit_btn = page.locator("button[data-qa='vacancy-response-submit-popup']")
-            if await submit_btn.count() > 0:
-                await submit_btn.click()
-                await page.wait_for_timeout(3000)
-                return ApplyResult(ApplyStatus.SUCCESS, "Applied with cover letter")
+            if state["modalSubmit"]:
+                await self._click_and_wait_outcome(
+                    page, page.locator(SEL_MODAL_SUBMIT), SEL_SUCCESS
+                )
+                return ApplyResult(
+                    ApplyStatus.SUCCESS,
+                    "Applied with cover letter",
+                    # Без заполненного письма результат не считаем подтвержденным
+                    confirmed=(
+                        bool(state["modalLetterArea"])
+                        and await self._check_application_success(page)
+                    )
+                )
             else:
                 return ApplyResult(ApplyStatus.ERROR, "Submit button not found")
                 
         except Exception as e:
-            logger.error(f"Modal interaction failed: {e}")
+            logger.error("Modal interaction failed: %s", e)
             return None
 
     async def _try_cover_letter_link(
         self,
         page: Page,
-        message: str
+        message: str,
+        state: dict
     ) -> Optional[ApplyResult]:
-        """Попытка отклика через ссылку 'Написать сопроводительное'."""
-        cover_letter_link = page.locator("a:has-text('Написать сопроводительное')")
+        """
+        Попытка отклика через ссылку 'Написать сопроводительное'.
         
-        if await cover_letter_link.count() > 0 and message:
+        Аргументы:
+            state: Снимок страницы из _probe_state, сделанный после загрузки.
+        """
+        if state["coverLink"] and message:
             logger.debug("Found 'Write cover letter' link, clicking...")
-            await cover_letter_link.first.click()
+            await page.locator(SEL_COVER_LINK).first.click()
             result = await self._fill_cover_letter_modal(page, message)
             if result:
                 return result
@@ -100,25 +244,29 @@ class VacancyApplyService:
     async def _try_dropdown_apply(
         self,
         page: Page,
+        apply_btn: Locator,
         message: str
     ) -> Optional[ApplyResult]:
-        """Попытка отклика через выпадающее меню с опцией сопроводительного письма."""
-        dropdown_arrow = page.locator(
-            "[data-qa='vacancy-response-link-top'] + button, "
-            "[data-qa='vacancy-response-link-bottom'] + button"
-        )
+        """
+        Попытка отклика через выпадающее меню с опцией сопроводительного письма.
         
-        if await dropdown_arrow.count() > 0 and message:
+        Аргументы:
+            apply_btn: Найденная кнопка отклика, рядом с которой находится меню.
+        """
+        if message:
             logger.debug("Found dropdown, expanding options...")
-            await dropdown_arrow.first.click()
-            await page.wait_for_timeout(500)
+            await apply_btn.locator(SEL_DROPDOWN_TOGGLE).click()
             
-            with_letter_option = page.locator("text=С сопроводительным письмом")
-            if await with_letter_option.count() > 0:
-                await with_letter_option.first.click()
-                result = await self._fill_cover_letter_modal(page, message)
-                if result:
-                    return result
+            with_letter_option = page.locator(SEL_WITH_LETTER).first
+            try:
+                await with_letter_option.wait_for(state="visible", timeout=3000)
+            except PlaywrightTimeoutError:
+                return None
+
+            await with_letter_option.click()
+            result = await self._fill_cover_letter_modal(page, message)
+            if result:
+                return result
         
         return None
 
@@ -128,39 +276,40 @@ class VacancyApplyService:
         message: str
     ) -> Optional[ApplyResult]:
         """Попытка заполнения сопроводительного письма на экране после отклика."""
-        resume_delivered = page.locator("text=Резюме доставлено")
+        state = await self._probe_state(page)
         
-        if await resume_delivered.count() > 0 or await page.locator("textarea").count() > 0:
+        if state["resumeDelivered"] or state["textareas"]:
             logger.debug("Found post-apply screen")
             
-            letter_area = page.locator("textarea")
-            if await letter_area.count() > 0 and message:
-                await letter_area.first.fill(message)
+            if state["textareas"] and message:
+                await page.locator(SEL_TEXTAREA).first.fill(message)
                 
-                submit_btn = page.locator("button:has-text('Отправить')")
-                if await submit_btn.count() > 0:
-                    await submit_btn.first.click()
-                    await page.wait_for_timeout(2000)
-                    return ApplyResult(ApplyStatus.SUCCESS, "Applied with post-apply cover letter")
+                if state["submitButton"]:
+                    await self._click_and_wait_outcome(
+                        page, page.locator(SEL_POST_APPLY_SUBMIT).first, SEL_SUCCESS,
+                        timeout=2000
+                    )
+                    return ApplyResult(
+                        ApplyStatus.SUCCESS,
+                        "Applied with post-apply cover letter",
+                        confirmed=await self._check_application_success(page)
+                    )
         
         return None
 
     async def _check_application_success(self, page: Page) -> bool:
         """Проверка успешности отправки отклика."""
-        success_texts = [
-            "text=Отклик отправлен",
-            "text=Вы откликнулись",
-            "text=Резюме доставлено"
-        ]
-        for selector in success_texts:
-            if await page.locator(selector).count() > 0:
-                return True
-        return False
+        return await page.evaluate(_SUCCESS_JS, list(SUCCESS_TEXTS))
 
     async def apply(self, url: str, message: str = "") -> dict:
         """
         Отклик на вакансию с опциональным сопроводительным письмом.
         
+        Подтвержденные и пропущенные отклики запоминаются: повторный вызов для
+        того же URL возвращает сохраненный результат без открытия страницы.
+        Одновременные вызовы для одного URL ждут результата первого.
+        Кэш сбрасывается при изменении файла сессии.
+        
         Аргументы:
             url: URL вакансии.
             message: Опциональный текст сопроводительного письма.
@@ -168,72 +317,147 @@ class VacancyApplyService:
         Возвращает:
             Словарь со статусом и сообщением.
         """
-        logger.info(f"Applying to: {url}")
+        session_version = browser_manager.session_version()
+        if session_version != self._cache_session_version:
+            self._result_cache.clear()
+            self._cache_session_version = session_version
+
+        cached = self._result_cache.get(url)
+        if cached is not None:
+            self._result_cache.move_to_end(url)
+            logger.info("Already processed, returning cached result: %s", url)
+            return dict(cached)
+
+        in_flight = self._in_flight.get(url)
+        if in_flight is not None:
+            logger.info("Apply already in progress, waiting for it: %s", url)
+            try:
+                return dict(await asyncio.shield(in_flight))
+            except asyncio.CancelledError:
+                if not in_flight.cancelled():
+                    # Отменен сам ожидающий вызов
+                    raise
+                # Отменен первый вызов, а не мы: выполняем отклик сами
+                return await self.apply(url, message)
+
+        future: asyncio.Future[dict] = asyncio.get_running_loop().create_future()
+        self._in_flight[url] = future
+        try:
+            result = await self._apply(url, message)
+            result_dict = result.to_dict()
+            if result.status == ApplyStatus.SKIPPED or result.confirmed:
+                self._result_cache[url] = result_dict
+                if len(self._result_cache) > RESULT_CACHE_SIZE:
+                    self._result_cache.popitem(last=False)
+            future.set_result(result_dict)
+        finally:
+            del self._in_flight[url]
+            if not future.done():
+                future.cancel()
+        return dict(result_dict)
+
+    async def _apply(self, url: str, message: str) -> ApplyResult:
+        """Отклик на вакансию без учета кэша результатов."""
+        logger.info("Applying to: %s", url)
         if message:
-            logger.debug(f"Cover letter: {len(message)} chars")
+            logger.debug("Cover letter: %d chars", len(message))
 
         try:
-            async with browser_manager.get_page(use_session=True) as page:
+            async with browser_manager.acquire_tab() as page:
                 # Переход к вакансии
                 try:
                     await page.goto(url, wait_until="domcontentloaded", timeout=30000)
                 except Exception as e:
-                    logger.warning(f"Navigation timeout: {e}")
+                    logger.warning("Navigation timeout: %s", e)
                     # Продолжаем в любом случае, страница могла загрузиться достаточно
 
+                # Кнопки отклика могут дорисовываться скриптами после разбора документа;
+                # страницы без них (архив, 404) не должны задерживать отказ надолго
+                try:
+                    await page.wait_for_selector(SEL_PAGE_READY, timeout=2000)
+                except PlaywrightTimeoutError:
+                    logger.debug("No apply controls on the page yet, probing anyway")
+
+                # Все предварительные проверки одним запросом к странице
+                state = await self._probe_state(page)
+
                 # Проверка защиты от ботов
-                if await self._check_bot_protection(page):
+                if state["captcha"]:
                     return ApplyResult(
                         ApplyStatus.ERROR,
                         "Bot protection triggered (captcha)"
-                    ).to_dict()
+                    )
 
                 # Проверка, был ли уже отклик
-                if await self._check_already_applied(page):
-                    return ApplyResult(ApplyStatus.SKIPPED, "Already applied").to_dict()
+                if state["alreadyApplied"]:
+                    return ApplyResult(ApplyStatus.SKIPPED, "Already applied")
 
                 # Стратегия 1: Попытка через ссылку сопроводительного письма
-                result = await self._try_cover_letter_link(page, message)
+                result = await self._try_cover_letter_link(page, message, state)
                 if result:
-                    return result.to_dict()
+                    return result
 
                 # Поиск кнопки отклика
-                apply_btn = page.locator("[data-qa='vacancy-response-link-top']")
-                if await apply_btn.count() == 0:
-                    apply_btn = page.locator("[data-qa='vacancy-response-link-bottom']")
-
-                if await apply_btn.count() == 0:
+                if state["applyTop"]:
+                    apply_btn = page.locator(SEL_APPLY_TOP).first
+                    has_dropdown = state["dropdownTop"]
+                elif state["applyBottom"]:
+                    apply_btn = page.locator(SEL_APPLY_BOTTOM).first
+                    has_dropdown = state["dropdownBottom"]
+                else:
                     return ApplyResult(
                         ApplyStatus.ERROR,
                         "Apply button not found"
-                    ).to_dict()
+                    )
 
                 # Стратегия 2: Попытка через выпадающий список с сопроводительным
-                result = await self._try_dropdown_apply(page, message)
-                if result:
-                    return result.to_dict()
+                if has_dropdown:
+                    result = await self._try_dropdown_apply(page, apply_btn, message)
+                    if result:
+                        return result
 
                 # Стратегия 3: Стандартная кнопка отклика
                 logger.debug("Clicking standard apply button...")
-                await apply_btn.first.click()
-                await page.wait_for_timeout(2000)
+                await self._click_and_wait_outcome(
+                    page, apply_btn, SEL_APPLY_OUTCOME, timeout=2000
+                )
 
                 # Стратегия 4: Сопроводительное письмо после отклика
                 result = await self._try_post_apply_letter(page, message)
                 if result:
-                    return result.to_dict()
+                    return result
 
                 # Проверка успешности отклика
                 if await self._check_application_success(page):
-                    return ApplyResult(ApplyStatus.SUCCESS, "Applied successfully").to_dict()
+                    return ApplyResult(
+                        ApplyStatus.SUCCESS,
+                        "Applied successfully",
+                        confirmed=True
+                    )
                 else:
                     return ApplyResult(
                         ApplyStatus.SUCCESS,
                         "Applied (status unclear)"
-                    ).to_dict()
+                    )
 
         except FileNotFoundError as e:
-            return ApplyResult(ApplyStatus.ERROR, str(e)).to_dict()
+            return ApplyResult(ApplyStatus.ERROR, str(e))
         except Exception as e:
-            logger.error(f"Application failed: {e}", exc_info=True)
-            return ApplyResult(ApplyStatus.ERROR, str(e)).to_dict()
+            logger.error("Application failed: %s", e, exc_info=True)
+            return ApplyResult(ApplyStatus.ERROR, str(e))
+
+    async def apply_many(self, items: list[tuple[str, str]]) -> list[dict]:
+        """
+        Параллельный отклик на несколько вакансий.
+        
+        Одновременность ограничена размером пула вкладок (BROWSER_MAX_PAGES).
+        
+        Аргументы:
+            items: Список пар (URL вакансии, текст сопроводительного письма).
+            
+        Возвращает:
+            Список результатов в том же порядке, что и items.
+        """
+        return await asyncio.gather(
+            *(self.apply(url, message) for url, message in items)
+        )
@@ -12,15 +12,158 @@ from ..config import get_settings
 
 logger = logging.getLogger(__name__)
 
+# Признаки страницы с капчей без выгрузки всего HTML через page.content()
+BOT_PROTECTION_EXPR = """(
+    /captcha/i.test(location.href)
+    || /captcha|robot/i.test(document.title)
+    || !!document.querySelector("[data-qa*=captcha], iframe[src*=captcha], img[src*=captcha]")
+)"""
+BOT_PROTECTION_JS = f"() => {BOT_PROTECTION_EXPR}"
+
+# Картинки и счетчики аналитики не нужны для поиска и откликов. Отключаем их флагами
+# Chromium, а не через context.route: перехват запросов отключает HTTP-кэш контекста
+BLOCKED_HOSTS = (
+    "*google-analytics.com",
+    "*googletagmanager.com",
+    "mc.yandex.ru",
+    "*doubleclick.net",
+)
+BLOCK_RESOURCES_ARGS = (
+    "--blink-settings=imagesEnabled=false",
+    "--host-resolver-rules=" + ", ".join(f"MAP {host} ~NOTFOUND" for host in BLOCKED_HOSTS),
+)
+
+
+class PagePoolClosedError(RuntimeError):
+    """Пул вкладок закрыт (например, после перезагрузки сессии)."""
+
+
+class PagePool:
+    """
+    Ограниченный пул вкладок поверх одного контекста браузера.
+    
+    Не более max_pages вкладок используются одновременно; при reuse_pages
+    освобожденные вкладки сбрасываются на about:blank и выдаются повторно.
+    """
+
+    def __init__(
+        self,
+        context: BrowserContext,
+        max_pages: int = 4,
+        reuse_pages: bool = True,
+        page_timeout: Optional[int] = None
+    ) -> None:
+        self._context = context
+        self._semaphore = asyncio.Semaphore(max_pages)
+        self._reuse_pages = reuse_pages
+        self._page_timeout = page_timeout
+        self._idle: list[Page] = []
+        self._busy = 0
+        self._drained = asyncio.Event()
+        self._drained.set()
+        self._closed = False
+        self._closing: Optional[asyncio.Task] = None
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    async def _new_page(self) -> Page:
+        page = await self._context.new_page()
+        if self._page_timeout is not None:
+            page.set_default_timeout(self._page_timeout)
+        return page
+
+    async def get(self) -> Page:
+        """
+        Получение вкладки из пула.
+        
+        Ждет, пока освободится место, если все max_pages вкладок заняты.
+        
+        Исключения:
+            PagePoolClosedError: Если пул закрыт.
+        """
+        if self._closed:
+            raise PagePoolClosedError("Page pool is closed")
+        await self._semaphore.acquire()
+        if self._closed:
+            self._semaphore.release()
+            raise PagePoolClosedError("Page pool is closed")
+
+        self._busy += 1
+        self._drained.clear()
+        try:
+            return self._idle.pop() if self._idle else await self._new_page()
+        except BaseException:
+            self._mark_free()
+            raise
+
+    async def put(self, page: Page) -> None:
+        """Возврат вкладки в пул или ее закрытие, если пул закрыт."""
+        try:
+            if page.is_closed():
+                return
+            if self._reuse_pages and not self._closed:
+                try:
+                    await page.goto("about:blank")
+                    self._idle.append(page)
+                    return
+                except Exception as e:
+                    logger.warning("Failed to reset page, closing it: %s", e)
+            await page.close()
+        finally:
+            self._mark_free()
+
+    def _mark_free(self) -> None:
+        self._busy -= 1
+        self._semaphore.release()
+        if self._busy == 0:
+            self._drained.set()
+
+    @asynccontextmanager
+    async def acquire(self) -> AsyncGenerator[Page, None]:
+        """Вкладка из пула на время блока with."""
+        page = await self.get()
+        try:
+            yield page
+        finally:
+            await self.put(page)
+
+    async def close(self) -> None:
+        """
+        Ожидание освобождения занятых вкладок и закрытие всех вкладок пула.
+        
+        Новые get() сразу завершаются PagePoolClosedError.
+        Повторные вызовы ждут завершения первого закрытия.
+        """
+        self._closed = True
+        if self._closing is None:
+            self._closing = asyncio.ensure_future(self._close())
+        await asyncio.shield(self._closing)
+
+    async def _close(self) -> None:
+        await self._drained.wait()
+        while self._idle:
+            page = self._idle.pop()
+            if not page.is_closed():
+                await page.close()
+
 
 class BrowserManager:
     """
     Управляет жизненным циклом браузера Playwright.
+    
+    Браузер и контекст с сессией живут всё время работы процесса,
+    на каждый запрос открывается только новая вкладка.
     """
 
     def __init__(self) -> None:
         self._playwright: Optional[Playwright] = None
         self._browser: Optional[Browser] = None
+        self._session_context: Optional[BrowserContext] = None
+        self._page_pool: Optional[PagePool] = None
+        self._session_mtime_ns: Optional[int] = None
+        self._retiring: set[asyncio.Task] = set()
         self._lock = asyncio.Lock()
         self._settings = get_settings()
 
@@ -30,15 +173,45 @@ class BrowserManager:
             if self._playwright is None:
                 logger.info("Starting Playwright...")
                 self._playwright = await async_playwright().start()
-                self._browser = await self._playwright.chromium.launch(
-                    headless=self._settings.browser_headless,
-                    slow_mo=self._settings.browser_slow_mo
-                )
+                self._browser = await self._connect_or_launch()
                 logger.info("Browser launched successfully")
 
+    async def _connect_or_launch(self) -> Browser:
+        """
+        Подключение к внешнему браузеру по CDP или запуск собственного.
+        
+        Если задан BROWSER_CDP_PORT, подключаемся к уже запущенному Chromium на этом
+        порту; им управляют снаружи, поэтому BROWSER_HEADLESS, BROWSER_SLOW_MO
+        и BROWSER_BLOCK_RESOURCES к нему не применяются.
+        """
+        port = self._settings.browser_cdp_port
+        if port:
+            endpoint = f"http://127.0.0.1:{port}"
+            browser = await self._playwright.chromium.connect_over_cdp(endpoint)
+            logger.info("Connected to running browser at %s", endpoint)
+            return browser
+
+        args: list[str] = []
+        if self._settings.browser_block_resources:
+            args.extend(BLOCK_RESOURCES_ARGS)
+        return await self._playwright.chromium.launch(
+            headless=self._settings.browser_headless,
+            slow_mo=self._settings.browser_slow_mo,
+            args=args
+        )
+
     async def stop(self) -> None:
+        if self._retiring:
+            await asyncio.gather(*self._retiring, return_exceptions=True)
         async with self._lock:
+            if self._page_pool:
+                await self._page_pool.close()
+                self._page_pool = None
+            if self._session_context:
+                await self._session_context.close()
+                self._session_context = None
             if self._browser:
+                # Для браузера, подключенного по CDP, close() только отключается от него
                 await self._browser.close()
                 self._browser = None
             if self._playwright:
@@ -54,6 +227,92 @@ class BrowserManager:
                 "Run 'python -m hh_automation.cli.login' first."
             )
 
+    def session_version(self) -> Optional[int]:
+        """Версия файла сессии (mtime в наносекундах) или None, если файла нет."""
+        try:
+            return self._settings.session_file.stat().st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    async def _retire(self, pool: PagePool, context: BrowserContext) -> None:
+        """Закрытие устаревшего контекста после завершения работы его вкладок."""
+        try:
+            await pool.close()
+            await context.close()
+        except Exception as e:
+            logger.warning("Failed to close stale session context: %s", e)
+
+    async def get_page_pool(self) -> PagePool:
+        """
+        Получение пула вкладок долгоживущего контекста с сохраненной сессией.
+        
+        Если файл сессии изменился (например, после повторного входа),
+        создается новый контекст, а старый закрывается в фоне.
+        """
+        if not self._browser:
+            await self.start()
+
+        self._validate_session()
+        session_file = self._settings.session_file
+        mtime_ns = session_file.stat().st_mtime_ns
+
+        async with self._lock:
+            if self._page_pool is None or mtime_ns != self._session_mtime_ns:
+                # Сначала готовим новый контекст: если файл сессии еще дописывается
+                # или контекст не создался, продолжаем работать с текущим пулом
+                try:
+                    context = await self._browser.new_context(
+                        storage_state=str(session_file)
+                    )
+                except Exception as e:
+                    if self._page_pool is None:
+                        raise
+                    logger.warning("Failed to reload session, keeping current one: %s", e)
+                    return self._page_pool
+                pool = PagePool(
+                    context,
+                    max_pages=self._settings.browser_max_pages,
+                    page_timeout=self._settings.page_timeout
+                )
+
+                if self._page_pool is not None:
+                    logger.info("Session file changed, reloading browser context")
+                    task = asyncio.create_task(
+                        self._retire(self._page_pool, self._session_context)
+                    )
+                    self._retiring.add(task)
+                    task.add_done_callback(self._retiring.discard)
+
+                self._session_context = context
+                self._page_pool = pool
+                self._session_mtime_ns = mtime_ns
+            return self._page_pool
+
+    @asynccontextmanager
+    async def acquire_tab(self) -> AsyncGenerator[Page, None]:
+        """
+        Получение вкладки в общем контексте с сессией.
+        
+        По выходу вкладка возвращается в пул, браузер и контекст остаются.
+        
+        Возвращает:
+            Настроенную страницу браузера, готовую к использованию.
+        """
+        # Пул могли закрыть между получением и запросом вкладки (перезагрузка
+        # сессии, остановка) — тогда берем актуальный
+        for attempt in range(3):
+            pool = await self.get_page_pool()
+            try:
+                page = await pool.get()
+                break
+            except PagePoolClosedError:
+                if attempt == 2:
+                    raise
+        try:
+            yield page
+        finally:
+            await pool.put(page)
+
     @asynccontextmanager
     async def get_page(self, use_session: bool = True) -> AsyncGenerator[Page, None]:
         """
@@ -65,27 +324,23 @@ class BrowserManager:
         Возвращает:
             Настроенную страницу браузера, готовую к использованию.
         """
+        if use_session:
+            async with self.acquire_tab() as page:
+                yield page
+            return
+
         if not self._browser:
             await self.start()
 
-        context: Optional[BrowserContext] = None
+        context = await self._browser.new_context()
         try:
-            if use_session:
-                self._validate_session()
-                context = await self._browser.new_context(
-                    storage_state=str(self._settings.session_file)
-                )
-            else:
-                context = await self._browser.new_context()
-
             page = await context.new_page()
             page.set_default_timeout(self._settings.page_timeout)
             
             yield page
             
         finally:
-            if context:
-                await context.close()
+            await context.close()
 
     @asynccontextmanager
     async def get_interactive_context(self, headless: Optional[bool] = None) -> AsyncGenerator[tuple[BrowserContext, Page], None]:
@@ -7,7 +7,7 @@ from typing import Optional
 from playwright.async_api import Page
 
 from ..config import get_settings
-from .browser import browser_manager
+from .browser import BOT_PROTECTION_JS, browser_manager
 
 logger = logging.getLogger(__name__)
 
@@ -56,14 +56,12 @@ class VacancySearchService:
             return ""
             
         except Exception as e:
-            logger.warning(f"Failed to get description for {url}: {e}")
+            logger.warning("Failed to get description for %s: %s", url, e)
             return ""
 
     async def _check_bot_protection(self, page: Page) -> bool:
         """Проверка, сработала ли защита от ботов (капча)."""
-        title = await page.title()
-        content = await page.content()
-        return "captcha" in title.lower() or "robot" in content.lower()
+        return await page.evaluate(BOT_PROTECTION_JS)
 
     async def search(
         self,
@@ -86,7 +84,7 @@ class VacancySearchService:
         """
         query = query or self._settings.default_search_text
         
-        logger.info(f"Searching vacancies: query='{query}', page={page_num}")
+        logger.info("Searching vacancies: query='%s', page=%s", query, page_num)
 
         async with browser_manager.get_page(use_session=True) as page:
             # Сборка URL для поиска
@@ -130,7 +128,7 @@ class VacancySearchService:
                     })
                     
                 except Exception as e:
-                    logger.warning(f"Failed to parse vacancy card {i}: {e}")
+                    logger.warning("Failed to parse vacancy card %s: %s", i, e)
                     continue
 
             # Получение полных описаний для каждой вакансии
@@ -145,5 +143,5 @@ class VacancySearchService:
                 )
                 vacancies.append(vacancy.to_dict())
 
-            logger.info(f"Found {len(vacancies)} vacancies")
+            logger.info("Found %d vacancies", len(vacancies))
             return vacancies